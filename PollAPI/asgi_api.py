@@ -0,0 +1,16 @@
+"""
+ASGI config for PollAPI API-only worker processes.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PollAPI.settings_api_asgi')
+
+application = get_asgi_application()
@@ -49,6 +49,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'polls.profiling.QueryProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'PollAPI.urls'
@@ -122,3 +123,54 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Idempotency-Key support for create endpoints
+# Responses are replayed for IDEMPOTENCY_KEY_TTL seconds; each worker keeps
+# the IDEMPOTENCY_KEY_CACHE_SIZE most recent keys in memory
+
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+IDEMPOTENCY_KEY_CACHE_SIZE = 1024
+
+
+# Per-request SQL profiling
+# Profile a fraction of requests (0.01 = 1%), or any request sending an
+# X-Query-Profile header when QUERY_PROFILING_ALLOW_HEADER is on. Reports go
+# to the "polls.profiling" logger
+
+QUERY_PROFILING_SAMPLE_RATE = 0.0
+
+QUERY_PROFILING_ALLOW_HEADER = DEBUG
+
+QUERY_PROFILING_SLOW_MS = 100
+
+QUERY_PROFILING_REPEAT_THRESHOLD = 3
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+# Query profile reports are logged at INFO (WARNING when something is
+# flagged); without a handler Python would drop the INFO ones
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'polls.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
+# Test runner
+# Excludes opt-in tags such as "scale" unless selected with --tag
+
+TEST_RUNNER = 'PollAPI.test_runner.PollAPITestRunner'
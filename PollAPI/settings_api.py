@@ -0,0 +1,70 @@
+"""
+API-only settings profile for PollAPI worker processes.
+
+Extends the default settings, dropping the apps, middleware and template
+engine that only the admin and browsable HTML pages need. API nodes serve
+JSON exclusively and authenticate each request on its own, so no session
+or message state is kept between requests.
+
+Select it with DJANGO_SETTINGS_MODULE=PollAPI.settings_api, or serve the
+PollAPI.wsgi_api entry point. ASGI workers use PollAPI.settings_api_asgi
+through PollAPI.asgi_api.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'rest_framework',
+    'polls',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'polls.profiling.QueryProfilingMiddleware',
+]
+
+ROOT_URLCONF = 'PollAPI.urls_api'
+
+TEMPLATES = []
+
+WSGI_APPLICATION = 'PollAPI.wsgi_api.application'
+
+
+# Database
+# Keep connections open between requests instead of reconnecting each time.
+# WSGI only: PollAPI.settings_api_asgi turns this off again
+# https://docs.djangoproject.com/en/5.2/ref/databases/#persistent-connections
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],  # noqa: F405
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    # JSON only: the browsable API renderer needs the template engine
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+    # Stateless: a signed bearer token travels with every request, checked
+    # with an HMAC instead of a session lookup or password hash
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'polls.authentication.SignedTokenAuthentication',
+    ],
+}
+
+# Seconds a token from polls.authentication.issue_token stays valid
+
+API_TOKEN_MAX_AGE = 24 * 60 * 60
@@ -0,0 +1,20 @@
+"""
+API-only settings profile for PollAPI ASGI worker processes.
+
+Same as PollAPI.settings_api, but without persistent database connections:
+Django recommends disabling them under ASGI, where requests may run on
+different threads, and relying on connection pooling instead.
+https://docs.djangoproject.com/en/5.2/ref/databases/#persistent-database-connections
+"""
+
+from .settings_api import *  # noqa: F401,F403
+
+
+# Database
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],  # noqa: F405
+        'CONN_MAX_AGE': 0,
+    }
+}
@@ -0,0 +1,7 @@
+# PollAPI/urls_api.py
+
+from django.urls import path, include
+
+urlpatterns = [
+    path('api/', include('polls.urls')),
+]
@@ -0,0 +1,16 @@
+"""
+WSGI config for PollAPI API-only worker processes.
+
+It exposes the WSGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PollAPI.settings_api')
+
+application = get_wsgi_application()
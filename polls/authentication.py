@@ -0,0 +1,44 @@
+# polls/authentication.py
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from rest_framework import authentication, exceptions
+
+TOKEN_SALT = 'polls.authentication.SignedTokenAuthentication'
+
+
+def issue_token(user):
+    """Return a signed bearer token identifying ``user``"""
+    return signing.dumps({'user_id': user.pk}, salt=TOKEN_SALT, compress=True)
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """Stateless bearer-token authentication.
+
+    Clients send ``Authorization: Bearer <token>`` where the token comes
+    from ``issue_token``. Verifying it is an HMAC check against SECRET_KEY
+    plus one primary-key lookup for the user, with no password hashing
+    and no token table. Tokens expire after API_TOKEN_MAX_AGE seconds.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        max_age = getattr(settings, 'API_TOKEN_MAX_AGE', 24 * 60 * 60)
+        try:
+            payload = signing.loads(auth[1].decode(), salt=TOKEN_SALT, max_age=max_age)
+        except (signing.BadSignature, UnicodeDecodeError):
+            raise exceptions.AuthenticationFailed('Invalid or expired token.')
+
+        user = get_user_model().objects.filter(pk=payload.get('user_id')).first()
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (user, None)
+
+    def authenticate_header(self, request):
+        return self.keyword
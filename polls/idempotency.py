@@ -0,0 +1,184 @@
+# polls/idempotency.py
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+class StoredResponse:
+    """A response saved under an idempotency key"""
+
+    __slots__ = ('request_method', 'request_path', 'request_hash', 'status_code', 'body',
+                 'created_at')
+
+    def __init__(self, request_method, request_path, request_hash, status_code, body,
+                 created_at):
+        self.request_method = request_method
+        self.request_path = request_path
+        self.request_hash = request_hash
+        self.status_code = status_code
+        self.body = body
+        self.created_at = created_at
+
+    def matches(self, request, body_hash):
+        """Return True if ``request`` repeats the request this response answered"""
+        return ((self.request_method, self.request_path, self.request_hash)
+                == (request.method, request.path, body_hash))
+
+
+def request_hash(request):
+    """SHA-256 of the parsed request data, used to spot a key reused for other data.
+
+    Hashes a canonical JSON dump of ``request.data`` rather than the raw body,
+    so retries that differ only in whitespace, key order or multipart
+    boundary still match. Parsing is not validation; the serializer never runs.
+    """
+    data = request.data
+    if hasattr(data, 'lists'):
+        # QueryDict from form or multipart data: keep every value per key
+        data = dict(data.lists())
+    canonical = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """Bounded store of responses keyed by Idempotency-Key.
+
+    Recent keys live in a per-process LRU; anything older or written by
+    another worker is found in the IdempotencyKey table through its unique
+    index. Entries expire after ``ttl``.
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        if max_entries is None:
+            max_entries = getattr(settings, 'IDEMPOTENCY_KEY_CACHE_SIZE', 1024)
+        if ttl is None:
+            ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+        self.max_entries = max_entries
+        self.ttl = timedelta(seconds=ttl)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the live StoredResponse for ``key``, or None"""
+        now = timezone.now()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.created_at + self.ttl > now:
+                    self._entries.move_to_end(key)
+                    return entry
+                del self._entries[key]
+
+        record = IdempotencyKey.objects.filter(key=key).first()
+        if record is None:
+            return None
+        if record.created_at + self.ttl <= now:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            return None
+        entry = StoredResponse(record.request_method, record.request_path, record.request_hash,
+                               record.status_code, record.response_body, record.created_at)
+        self._remember(key, entry)
+        return entry
+
+    def save(self, key, request, body_hash, response):
+        """Persist ``response`` under ``key`` within the current transaction.
+
+        Raises IntegrityError if another request already claimed the key.
+        The in-memory copy is only added once the transaction commits, so a
+        rolled-back write is never replayed.
+        """
+        record = IdempotencyKey.objects.create(
+            key=key,
+            request_method=request.method,
+            request_path=request.path,
+            request_hash=body_hash,
+            status_code=response.status_code,
+            response_body=response.data,
+        )
+        entry = StoredResponse(record.request_method, record.request_path, record.request_hash,
+                               record.status_code, record.response_body, record.created_at)
+        transaction.on_commit(lambda: self._remember(key, entry))
+
+    def purge_expired(self):
+        """Delete expired keys from memory and the database; return the number deleted"""
+        cutoff = timezone.now() - self.ttl
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.created_at <= cutoff]:
+                del self._entries[key]
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lte=cutoff).delete()
+        return deleted
+
+    def clear(self):
+        """Forget every in-memory entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+idempotency_store = IdempotencyStore()
+
+
+class IdempotentCreateMixin:
+    """Replay the original response when a POST repeats an Idempotency-Key.
+
+    A repeated key returns the stored response without running validation
+    or the insert again. Reusing a key for a different endpoint or body is
+    rejected with 422. Only successful responses are stored, so a failed
+    request can be retried with the same key.
+    """
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return super().post(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {'error': 'Idempotency-Key must be 255 characters or less'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        body_hash = request_hash(request)
+        entry = idempotency_store.get(key)
+        if entry is not None:
+            return self.replay(request, body_hash, entry)
+
+        try:
+            with transaction.atomic():
+                response = super().post(request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    idempotency_store.save(key, request, body_hash, response)
+        except IntegrityError:
+            # A concurrent request with the same key committed first
+            entry = idempotency_store.get(key)
+            if entry is None:
+                raise
+            return self.replay(request, body_hash, entry)
+        return response
+
+    def replay(self, request, body_hash, entry):
+        if not entry.matches(request, body_hash):
+            return Response(
+                {'error': 'Idempotency-Key has already been used for a different request'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        return Response(entry.body, status=entry.status_code,
+                        headers={REPLAYED_HEADER: 'true'})
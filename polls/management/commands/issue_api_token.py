@@ -0,0 +1,20 @@
+# polls/management/commands/issue_api_token.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.authentication import issue_token
+
+
+class Command(BaseCommand):
+    help = 'Print a signed bearer token for the API-only worker profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(**{User.USERNAME_FIELD: options['username']})
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+        self.stdout.write(issue_token(user))
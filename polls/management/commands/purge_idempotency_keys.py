@@ -0,0 +1,12 @@
+# polls/management/commands/purge_idempotency_keys.py
+from django.core.management.base import BaseCommand
+
+from polls.idempotency import idempotency_store
+
+
+class Command(BaseCommand):
+    help = 'Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL.'
+
+    def handle(self, *args, **options):
+        deleted = idempotency_store.purge_expired()
+        self.stdout.write(f'Deleted {deleted} expired idempotency key(s).')
@@ -16,4 +16,16 @@ class Option(models.Model):
 
 class Vote(models.Model):
     poll = models.ForeignKey(Poll, on_delete=models.CASCADE)
-    option = models.ForeignKey(Option, on_delete=models.CASCADE)
\ No newline at end of file
+    option = models.ForeignKey(Option, on_delete=models.CASCADE)
+
+class IdempotencyKey(models.Model):
+    key = models.CharField(max_length=255, unique=True)
+    request_method = models.CharField(max_length=10)
+    request_path = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response_body = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,212 @@
+# polls/profiling.py
+import functools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from contextlib import ExitStack
+
+import django
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Query-Profile'
+PROFILE_HEADER_VALUES = {'1', 'true', 'yes', 'on'}
+
+_DJANGO_DIR = os.path.dirname(django.__file__)
+_THIS_FILE = __file__
+# Collapse placeholder lists such as IN (%s, %s, %s) so they share one shape
+_PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+_NUMBER = re.compile(r'\b\d+\b')
+
+
+def query_shape(sql):
+    """Normalise SQL so queries differing only in parameters compare equal"""
+    return _NUMBER.sub('?', _PLACEHOLDER_LIST.sub('%s...', sql))
+
+
+def query_stack(limit=5):
+    """Return up to ``limit`` project frames that led to the current query.
+
+    A frame counts as project code when its file lives under BASE_DIR, or
+    when it is a method running on an instance of a project class, e.g. the
+    inherited ``to_representation`` of a serializer defined in polls. The
+    latter is what points nested-serializer N+1 queries at the serializer
+    instead of at DRF. Innermost frames come first; this module is skipped.
+    """
+    stack = []
+    frame = sys._getframe(1)
+    while frame is not None and len(stack) < limit:
+        code = frame.f_code
+        if _is_project_file(code.co_filename):
+            stack.append(f'{_short_path(code.co_filename)}:{frame.f_lineno} in {code.co_name}')
+        elif code.co_argcount and code.co_varnames[0] == 'self':
+            cls = type(frame.f_locals.get('self'))
+            path = _project_class_path(cls)
+            if path is not None:
+                stack.append(f'{path} in {cls.__qualname__}.{code.co_name}')
+        frame = frame.f_back
+    return stack
+
+
+def query_origin():
+    """Return ``file:line in function`` for the first non-Django frame.
+
+    Fallback for queries issued without any project code on the stack.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(_DJANGO_DIR) and filename != _THIS_FILE:
+            return f'{_short_path(filename)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _is_project_file(filename):
+    return (filename.startswith(str(settings.BASE_DIR))
+            and 'site-packages' not in filename
+            and filename != _THIS_FILE)
+
+
+@functools.lru_cache(maxsize=None)
+def _project_class_path(cls):
+    module = sys.modules.get(cls.__module__)
+    filename = getattr(module, '__file__', None)
+    if filename is None or not _is_project_file(filename):
+        return None
+    return _short_path(filename)
+
+
+def _short_path(filename):
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir):
+        return os.path.relpath(filename, base_dir)
+    return filename.rpartition('site-packages' + os.sep)[2]
+
+
+class QueryProfile:
+    """Database execute wrapper that records every query run in one request"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            stack = query_stack()
+            self.queries.append({
+                'sql': sql,
+                'time_ms': round(duration * 1000, 3),
+                'origin': stack[0] if stack else query_origin(),
+                'stack': stack,
+                'alias': context['connection'].alias,
+            })
+
+    def report(self, slow_ms, repeat_threshold):
+        """Summarise the recorded queries, flagging slow and repeated shapes"""
+        shapes = {}
+        for query in self.queries:
+            shape = shapes.setdefault(query_shape(query['sql']), {
+                'sql': query['sql'],
+                'count': 0,
+                'time_ms': 0.0,
+                'origin': query['origin'],
+                'stack': query['stack'],
+            })
+            shape['count'] += 1
+            shape['time_ms'] = round(shape['time_ms'] + query['time_ms'], 3)
+
+        return {
+            'total_queries': len(self.queries),
+            'total_time_ms': round(sum(q['time_ms'] for q in self.queries), 3),
+            'slow_queries': [q for q in self.queries if q['time_ms'] >= slow_ms],
+            'repeated_queries': sorted(
+                (s for s in shapes.values() if s['count'] >= repeat_threshold),
+                key=lambda s: s['count'], reverse=True
+            ),
+        }
+
+
+class QueryProfilingMiddleware:
+    """Opt-in per-request SQL profiling.
+
+    A request is profiled when it is sampled (QUERY_PROFILING_SAMPLE_RATE)
+    or, if QUERY_PROFILING_ALLOW_HEADER is set, when it sends
+    ``X-Query-Profile: 1`` (or true/yes/on). Profiled requests log a JSON report to the
+    ``polls.profiling`` logger and get a summary in the ``X-Query-Profile``
+    response header. Unprofiled requests pay only for the sampling check.
+
+    Supports both sync and async chains, so ASGI workers do not pay for a
+    sync/async thread hop on every request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profile = QueryProfile()
+        with ExitStack() as stack:
+            self.install(stack, profile)
+            response = self.get_response(request)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        if not self.should_profile(request):
+            return await self.get_response(request)
+
+        # Connections are per thread; sync views under ASGI run on the
+        # request's thread-sensitive executor, so install the wrapper there
+        profile = QueryProfile()
+        stack = ExitStack()
+        await sync_to_async(self.install)(stack, profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, profile)
+
+    def install(self, stack, profile):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+
+    def finish(self, request, response, profile):
+        report = profile.report(
+            slow_ms=getattr(settings, 'QUERY_PROFILING_SLOW_MS', 100),
+            repeat_threshold=getattr(settings, 'QUERY_PROFILING_REPEAT_THRESHOLD', 3),
+        )
+        report.update(method=request.method, path=request.path, status=response.status_code)
+        level = logging.WARNING if report['slow_queries'] or report['repeated_queries'] else logging.INFO
+        logger.log(level, 'query profile %s', json.dumps(report), extra={'query_profile': report})
+        response[PROFILE_HEADER] = (
+            f"queries={report['total_queries']}; time_ms={report['total_time_ms']}; "
+            f"slow={len(report['slow_queries'])}; repeated={len(report['repeated_queries'])}"
+        )
+        return response
+
+    def should_profile(self, request):
+        if (getattr(settings, 'QUERY_PROFILING_ALLOW_HEADER', False)
+                and request.headers.get(PROFILE_HEADER, '').lower() in PROFILE_HEADER_VALUES):
+            return True
+        rate = getattr(settings, 'QUERY_PROFILING_SAMPLE_RATE', 0.0)
+        return rate > 0 and random.random() < rate
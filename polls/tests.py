@@ -1,19 +1,83 @@
-from django.test import TestCase
+import time
+from functools import partial
+from unittest import mock, skipUnless
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.management import call_command
+from django.db.models import Max
+from django.utils.crypto import get_random_string
+from django.test import SimpleTestCase, TestCase, override_settings, tag
+from django.test.client import encode_multipart
 from django.utils import timezone
-from rest_framework.test import APITestCase
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
 from rest_framework import status
 from django.urls import reverse
-from .models import Poll, Option, Vote
+from .models import Poll, Option, Vote, IdempotencyKey
+from .idempotency import IdempotencyStore, StoredResponse, idempotency_store
+from .authentication import SignedTokenAuthentication, issue_token
+from .profiling import query_shape
+from . import views
 from datetime import timedelta
+from PollAPI import settings_api, settings_api_asgi
+
+# Number of rows the opt-in "scale" tests load per table
+SCALE_ROWS = 10_000
+
+# Test data factories
+def make_poll(question_text="Test poll?", pub_date=None):
+    """Create a single poll, published one day from now by default"""
+    if pub_date is None:
+        pub_date = timezone.now() + timedelta(days=1)
+    return Poll.objects.create(question_text=question_text, pub_date=pub_date)
+
+def make_option(poll, option_text="Test option"):
+    """Create a single option attached to ``poll``"""
+    return Option.objects.create(poll=poll, option_text=option_text)
+
+def bulk_polls(count, options_per_poll=0, pub_date=None):
+    """Bulk-create ``count`` polls, each with ``options_per_poll`` options.
+
+    Uses one batched insert per table, so large datasets cost a handful of
+    queries instead of one per row. Returns ``(polls, options)``.
+    """
+    if pub_date is None:
+        pub_date = timezone.now() + timedelta(days=1)
+    polls = Poll.objects.bulk_create(
+        Poll(question_text=f"Poll {i}?", pub_date=pub_date) for i in range(count)
+    )
+    options = Option.objects.bulk_create(
+        Option(poll=poll, option_text=f"Option {j}")
+        for poll in polls
+        for j in range(options_per_poll)
+    )
+    return polls, options
+
+def bulk_votes(options, votes_per_option=1):
+    """Bulk-create ``votes_per_option`` votes for each option"""
+    return Vote.objects.bulk_create(
+        Vote(poll_id=option.poll_id, option=option)
+        for option in options
+        for _ in range(votes_per_option)
+    )
+
+def unused_pk(model):
+    """Return a primary key guaranteed not to exist for ``model``.
+
+    Safer than a hard-coded id such as 999, which may exist once a test
+    class loads enough rows.
+    """
+    return (model.objects.aggregate(Max('pk'))['pk__max'] or 0) + 1
 
 # Model Tests
 class PollModelTest(TestCase):
-    def setUp(self):
-        self.future_date = timezone.now() + timedelta(days=1)
-        self.poll = Poll.objects.create(
-            question_text="Test question?",
-            pub_date=self.future_date
-        )
+    @classmethod
+    def setUpTestData(cls):
+        cls.future_date = timezone.now() + timedelta(days=1)
+        cls.poll = make_poll(question_text="Test question?", pub_date=cls.future_date)
     
     def test_poll_creation(self):
         """Test that a poll is created correctly"""
@@ -31,16 +95,11 @@ class PollModelTest(TestCase):
         self.assertEqual(max_length, 200)
 
 class OptionModelTest(TestCase):
-    def setUp(self):
-        self.future_date = timezone.now() + timedelta(days=1)
-        self.poll = Poll.objects.create(
-            question_text="Test question?",
-            pub_date=self.future_date
-        )
-        self.option = Option.objects.create(
-            poll=self.poll,
-            option_text="Test option"
-        )
+    @classmethod
+    def setUpTestData(cls):
+        cls.future_date = timezone.now() + timedelta(days=1)
+        cls.poll = make_poll(question_text="Test question?", pub_date=cls.future_date)
+        cls.option = make_option(cls.poll, option_text="Test option")
     
     def test_option_creation(self):
         """Test that an option is created correctly"""
@@ -62,20 +121,12 @@ class OptionModelTest(TestCase):
         self.assertEqual(max_length, 200)
 
 class VoteModelTest(TestCase):
-    def setUp(self):
-        self.future_date = timezone.now() + timedelta(days=1)
-        self.poll = Poll.objects.create(
-            question_text="Test question?",
-            pub_date=self.future_date
-        )
-        self.option = Option.objects.create(
-            poll=self.poll,
-            option_text="Test option"
-        )
-        self.vote = Vote.objects.create(
-            poll=self.poll,
-            option=self.option
-        )
+    @classmethod
+    def setUpTestData(cls):
+        cls.future_date = timezone.now() + timedelta(days=1)
+        cls.poll = make_poll(question_text="Test question?", pub_date=cls.future_date)
+        cls.option = make_option(cls.poll, option_text="Test option")
+        cls.vote = Vote.objects.create(poll=cls.poll, option=cls.option)
     
     def test_vote_creation(self):
         """Test that a vote is created correctly"""
@@ -91,16 +142,14 @@ class VoteModelTest(TestCase):
 
 # API Tests
 class PollAPITest(APITestCase):
-    def setUp(self):
-        self.future_date = timezone.now() + timedelta(days=1)
-        self.poll_data = {
+    @classmethod
+    def setUpTestData(cls):
+        cls.future_date = timezone.now() + timedelta(days=1)
+        cls.poll_data = {
             'question_text': 'What is your favorite color?',
-            'pub_date': self.future_date.isoformat()
+            'pub_date': cls.future_date.isoformat()
         }
-        self.poll = Poll.objects.create(
-            question_text="Existing poll?",
-            pub_date=self.future_date
-        )
+        cls.poll = make_poll(question_text="Existing poll?", pub_date=cls.future_date)
     
     def test_get_polls_list(self):
         """Test retrieving list of polls"""
@@ -131,20 +180,12 @@ class PollAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 class VotingAPITest(APITestCase):
-    def setUp(self):
-        self.future_date = timezone.now() + timedelta(days=1)
-        self.poll = Poll.objects.create(
-            question_text="Test poll?",
-            pub_date=self.future_date
-        )
-        self.option1 = Option.objects.create(
-            poll=self.poll,
-            option_text="Option 1"
-        )
-        self.option2 = Option.objects.create(
-            poll=self.poll,
-            option_text="Option 2"
-        )
+    @classmethod
+    def setUpTestData(cls):
+        cls.future_date = timezone.now() + timedelta(days=1)
+        cls.poll = make_poll(question_text="Test poll?", pub_date=cls.future_date)
+        cls.option1 = make_option(cls.poll, option_text="Option 1")
+        cls.option2 = make_option(cls.poll, option_text="Option 2")
     
     def test_submit_vote(self):
         """Test submitting a valid vote"""
@@ -157,7 +198,7 @@ class VotingAPITest(APITestCase):
     def test_vote_invalid_option(self):
         """Test voting with invalid option ID"""
         url = reverse('poll-vote', kwargs={'pk': self.poll.pk})
-        vote_data = {'option_id': 999}
+        vote_data = {'option_id': unused_pk(Option)}
         response = self.client.post(url, vote_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
@@ -170,7 +211,7 @@ class VotingAPITest(APITestCase):
     
     def test_vote_invalid_poll(self):
         """Test voting on non-existent poll"""
-        url = reverse('poll-vote', kwargs={'pk': 999})
+        url = reverse('poll-vote', kwargs={'pk': unused_pk(Poll)})
         vote_data = {'option_id': self.option1.pk}
         response = self.client.post(url, vote_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -184,16 +225,11 @@ class VotingAPITest(APITestCase):
         self.assertEqual(len(response.data), 1)
 
 class OptionAPITest(APITestCase):
-    def setUp(self):
-        self.future_date = timezone.now() + timedelta(days=1)
-        self.poll = Poll.objects.create(
-            question_text="Test poll?",
-            pub_date=self.future_date
-        )
-        self.option = Option.objects.create(
-            poll=self.poll,
-            option_text="Test option"
-        )
+    @classmethod
+    def setUpTestData(cls):
+        cls.future_date = timezone.now() + timedelta(days=1)
+        cls.poll = make_poll(question_text="Test poll?", pub_date=cls.future_date)
+        cls.option = make_option(cls.poll, option_text="Test option")
     
     def test_get_options_list(self):
         """Test retrieving list of all options"""
@@ -240,10 +276,367 @@ class OptionAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Option.objects.count(), 0)
 
-class EdgeCaseTest(APITestCase):
+class IdempotencyKeyTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.poll = make_poll()
+        cls.option1 = make_option(cls.poll, option_text="Option 1")
+        cls.option2 = make_option(cls.poll, option_text="Option 2")
+        cls.url = reverse('poll-vote', kwargs={'pk': cls.poll.pk})
+
     def setUp(self):
-        self.future_date = timezone.now() + timedelta(days=1)
-        self.past_date = timezone.now() - timedelta(days=1)
+        # The in-memory store is per process; start every test cold
+        idempotency_store.clear()
+
+    def vote(self, option, key='vote-key', url=None):
+        return self.client.post(url or self.url, {'option_id': option.pk}, format='json',
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_repeated_key_creates_one_vote(self):
+        """Test that retrying a vote with the same key replays the first response"""
+        first = self.vote(self.option1)
+        second = self.vote(self.option1)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Vote.objects.count(), 1)
+
+    def test_different_keys_create_separate_votes(self):
+        """Test that distinct keys are independent requests"""
+        self.vote(self.option1, key='first')
+        self.vote(self.option1, key='second')
+        self.assertEqual(Vote.objects.count(), 2)
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        """Test that the header is opt-in"""
+        self.client.post(self.url, {'option_id': self.option1.pk}, format='json')
+        self.client.post(self.url, {'option_id': self.option1.pk}, format='json')
+        self.assertEqual(Vote.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 0)
+
+    def test_replay_is_a_single_probe(self):
+        """Test that a replay skips validation and runs one indexed lookup"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vote(self.option1)
+        # Warm: answered from the in-memory LRU
+        with self.assertNumQueries(0):
+            self.vote(self.option1)
+        # Cold: one lookup on the unique key index
+        idempotency_store.clear()
+        with self.assertNumQueries(1):
+            response = self.vote(self.option1)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['option_id'], self.option1.pk)
+        self.assertEqual(Vote.objects.count(), 1)
+
+    def test_key_reused_with_different_body(self):
+        """Test that a key cannot be replayed for a different payload"""
+        self.vote(self.option1)
+        response = self.vote(self.option2)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Vote.objects.count(), 1)
+
+    def test_key_reused_for_different_request(self):
+        """Test that a key cannot be replayed against another endpoint"""
+        self.vote(self.option1)
+        other_poll = make_poll()
+        other_option = make_option(other_poll)
+        url = reverse('poll-vote', kwargs={'pk': other_poll.pk})
+        response = self.vote(other_option, url=url)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Vote.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        """Test that a key can be retried after a failed request"""
+        response = self.client.post(self.url, {}, format='json', HTTP_IDEMPOTENCY_KEY='vote-key')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.vote(self.option1)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Vote.objects.count(), 1)
+
+    def test_expired_key_runs_request_again(self):
+        """Test that keys stop deduplicating after the TTL"""
+        self.vote(self.option1)
+        IdempotencyKey.objects.update(created_at=timezone.now() - idempotency_store.ttl)
+        response = self.vote(self.option1)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Vote.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_concurrent_duplicate_rolls_back_insert(self):
+        """Test that losing a race for the key undoes the duplicate vote"""
+        first = self.vote(self.option1)
+        stored = idempotency_store.get('vote-key')
+        # Simulate a second request whose lookup ran before the first committed
+        with mock.patch.object(idempotency_store, 'get', side_effect=[None, stored]):
+            second = self.vote(self.option1)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(Vote.objects.count(), 1)
+
+    def test_reformatted_json_retry_is_replayed(self):
+        """Test that a retry with the same JSON content but other whitespace replays"""
+        first = self.client.post(self.url, '{"option_id": %d}' % self.option1.pk,
+                                 content_type='application/json', HTTP_IDEMPOTENCY_KEY='vote-key')
+        second = self.client.post(self.url, '{"option_id":%d}' % self.option1.pk,
+                                  content_type='application/json', HTTP_IDEMPOTENCY_KEY='vote-key')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Vote.objects.count(), 1)
+
+    @skipUnless(apps.is_installed('django.contrib.sessions'), 'requires session support')
+    def test_multipart_retry_with_session(self):
+        """Test multipart retries from a session user, whose CSRF check reads the body"""
+        client = APIClient(enforce_csrf_checks=True)
+        client.force_login(get_user_model().objects.create_user('voter'))
+        token = get_random_string(32)
+        client.cookies[settings.CSRF_COOKIE_NAME] = token
+        responses = [
+            # A fresh multipart boundary per send, as real clients do
+            client.post(self.url, encode_multipart(f'boundary-{attempt}', {'option_id': self.option1.pk}),
+                        content_type=f'multipart/form-data; boundary=boundary-{attempt}',
+                        HTTP_X_CSRFTOKEN=token, HTTP_IDEMPOTENCY_KEY='vote-key')
+            for attempt in range(2)
+        ]
+        self.assertEqual([r.status_code for r in responses],
+                         [status.HTTP_201_CREATED, status.HTTP_201_CREATED])
+        self.assertEqual(responses[1]['Idempotent-Replayed'], 'true')
+        self.assertEqual(Vote.objects.count(), 1)
+
+    def test_key_too_long(self):
+        """Test that oversized keys are rejected"""
+        response = self.vote(self.option1, key='k' * 256)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Vote.objects.count(), 0)
+
+    def test_create_poll_and_option_with_key(self):
+        """Test that poll and option creation are also idempotent"""
+        poll_data = {
+            'question_text': 'Retry-safe poll?',
+            'pub_date': (timezone.now() + timedelta(days=1)).isoformat()
+        }
+        for _ in range(2):
+            self.client.post(reverse('poll-list'), poll_data, format='json',
+                             HTTP_IDEMPOTENCY_KEY='poll-key')
+        option_data = {'option_text': 'Retry-safe option', 'poll': self.poll.pk}
+        for _ in range(2):
+            self.client.post(reverse('option-list'), option_data, format='json',
+                             HTTP_IDEMPOTENCY_KEY='option-key')
+        self.assertEqual(Poll.objects.filter(question_text='Retry-safe poll?').count(), 1)
+        self.assertEqual(Option.objects.filter(option_text='Retry-safe option').count(), 1)
+
+    def test_lru_is_bounded(self):
+        """Test that the in-memory store evicts the least recently used key"""
+        store = IdempotencyStore(max_entries=2)
+        for key in ('a', 'b', 'c'):
+            store._remember(key, StoredResponse('POST', '/', '', 201, {}, timezone.now()))
+        self.assertEqual(list(store._entries), ['b', 'c'])
+
+    def test_purge_command_deletes_expired_keys(self):
+        """Test that purge_idempotency_keys removes only expired rows"""
+        self.vote(self.option1, key='old')
+        self.vote(self.option1, key='new')
+        IdempotencyKey.objects.filter(key='old').update(
+            created_at=timezone.now() - idempotency_store.ttl
+        )
+        call_command('purge_idempotency_keys', stdout=mock.Mock())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['new'])
+
+@override_settings(QUERY_PROFILING_ALLOW_HEADER=True, QUERY_PROFILING_SAMPLE_RATE=0.0,
+                   QUERY_PROFILING_SLOW_MS=100, QUERY_PROFILING_REPEAT_THRESHOLD=3)
+class QueryProfilingTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.polls, cls.options = bulk_polls(5, options_per_poll=2)
+
+    def profile(self, url, **headers):
+        """GET ``url`` and return the response and the logged report"""
+        with self.assertLogs('polls.profiling', level='INFO') as logs:
+            response = self.client.get(url, **headers)
+        return response, logs.records[-1].query_profile
+
+    def test_injected_n_plus_one_is_flagged(self):
+        """Test that nested options loaded per poll are reported as repeated"""
+        with mock.patch.object(views.PollList, 'queryset', Poll.objects.all()):
+            response, report = self.profile(reverse('poll-list'), HTTP_X_QUERY_PROFILE='1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(report['total_queries'], 1 + len(self.polls))
+        repeated, = report['repeated_queries']
+        self.assertEqual(repeated['count'], len(self.polls))
+        self.assertIn('polls_option', repeated['sql'])
+        self.assertTrue(repeated['origin'].startswith('polls/serializers.py'), repeated['origin'])
+        self.assertIn('PollSerializer', repeated['origin'])
+        self.assertTrue(all(frame.startswith('polls/') for frame in repeated['stack']))
+        self.assertIn('repeated=1', response['X-Query-Profile'])
+
+    def test_prefetched_poll_list_is_not_flagged(self):
+        """Test that the prefetching poll list runs a constant number of queries"""
+        response, report = self.profile(reverse('poll-list'), HTTP_X_QUERY_PROFILE='1')
+        self.assertEqual(report['total_queries'], 2)
+        self.assertEqual(report['repeated_queries'], [])
+        self.assertEqual(response['X-Query-Profile'],
+                         f"queries=2; time_ms={report['total_time_ms']}; slow=0; repeated=0")
+
+    @override_settings(QUERY_PROFILING_SLOW_MS=0)
+    def test_slow_queries_are_reported(self):
+        """Test that queries over the threshold are listed with timing and origin"""
+        _, report = self.profile(reverse('vote-list'), HTTP_X_QUERY_PROFILE='1')
+        slow, = report['slow_queries']
+        self.assertIn('polls_vote', slow['sql'])
+        self.assertGreaterEqual(slow['time_ms'], 0)
+        self.assertEqual(report['path'], reverse('vote-list'))
+
+    def test_requests_are_not_profiled_by_default(self):
+        """Test that profiling is off without the header or sampling"""
+        response = self.client.get(reverse('poll-list'))
+        self.assertNotIn('X-Query-Profile', response)
+
+    def test_falsy_header_does_not_profile(self):
+        """Test that only a truthy header value switches profiling on"""
+        for value in ('0', 'false', ''):
+            response = self.client.get(reverse('poll-list'), HTTP_X_QUERY_PROFILE=value)
+            self.assertNotIn('X-Query-Profile', response)
+
+    @override_settings(QUERY_PROFILING_ALLOW_HEADER=False)
+    def test_header_ignored_when_not_allowed(self):
+        """Test that clients cannot switch profiling on unless allowed"""
+        response = self.client.get(reverse('poll-list'), HTTP_X_QUERY_PROFILE='1')
+        self.assertNotIn('X-Query-Profile', response)
+
+    @override_settings(QUERY_PROFILING_ALLOW_HEADER=False, QUERY_PROFILING_SAMPLE_RATE=1.0)
+    def test_sampled_requests_are_profiled(self):
+        """Test that sampling profiles requests without the header"""
+        response, report = self.profile(reverse('option-list'))
+        self.assertEqual(report['total_queries'], 1)
+        self.assertIn('X-Query-Profile', response)
+
+    async def test_async_request_is_profiled(self):
+        """Test that profiling records queries when the chain runs async"""
+        with self.assertLogs('polls.profiling', level='INFO') as logs:
+            response = await self.async_client.get(reverse('poll-list'), headers={'X-Query-Profile': '1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(logs.records[-1].query_profile['total_queries'], 2)
+        self.assertIn('queries=2', response['X-Query-Profile'])
+
+    async def test_async_request_not_profiled_by_default(self):
+        """Test that unprofiled async requests pass straight through"""
+        response = await self.async_client.get(reverse('poll-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Query-Profile', response)
+
+    @override_settings(MIDDLEWARE=settings_api.MIDDLEWARE)
+    def test_async_chain_needs_no_thread_hop(self):
+        """Test that the API profile's async middleware chain is not adapted to sync"""
+        handler = BaseHandler()
+        with mock.patch.object(BaseHandler, 'adapt_method_mode', autospec=True,
+                               side_effect=BaseHandler.adapt_method_mode) as adapt:
+            handler.load_middleware(is_async=True)
+        modes = [(call.args[1], call.args[3]) for call in adapt.call_args_list]
+        self.assertTrue(modes)
+        self.assertTrue(all(is_async == method_is_async for is_async, method_is_async in modes),
+                        modes)
+
+    def test_query_shape_ignores_parameters(self):
+        """Test that queries differing only in literals share a shape"""
+        self.assertEqual(query_shape('SELECT 1 FROM t WHERE id IN (%s, %s) LIMIT 21'),
+                         query_shape('SELECT 1 FROM t WHERE id IN (%s, %s, %s) LIMIT 5'))
+
+class APISettingsProfileTest(SimpleTestCase):
+    def test_api_profile_drops_html_apps(self):
+        """Test that the API-only profile omits admin, sessions and messages"""
+        for app in ('django.contrib.admin', 'django.contrib.sessions',
+                    'django.contrib.messages', 'django.contrib.staticfiles'):
+            self.assertNotIn(app, settings_api.INSTALLED_APPS)
+        self.assertEqual(settings_api.TEMPLATES, [])
+
+    def test_api_profile_is_stateless(self):
+        """Test that the API-only profile keeps no session state"""
+        self.assertNotIn('django.contrib.sessions.middleware.SessionMiddleware',
+                         settings_api.MIDDLEWARE)
+        self.assertNotIn('django.middleware.csrf.CsrfViewMiddleware',
+                         settings_api.MIDDLEWARE)
+        self.assertEqual(settings_api.REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'],
+                         ['polls.authentication.SignedTokenAuthentication'])
+
+    def test_asgi_profile_disables_persistent_connections(self):
+        """Test that only the WSGI profile keeps database connections open"""
+        self.assertGreater(settings_api.DATABASES['default']['CONN_MAX_AGE'], 0)
+        self.assertEqual(settings_api_asgi.DATABASES['default']['CONN_MAX_AGE'], 0)
+
+@override_settings(MIDDLEWARE=settings_api.MIDDLEWARE, ROOT_URLCONF=settings_api.ROOT_URLCONF,
+                   REST_FRAMEWORK=settings_api.REST_FRAMEWORK)
+class APIProfileRequestTest(APITestCase):
+    client_class = partial(APIClient, enforce_csrf_checks=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.poll = make_poll()
+        cls.option = make_option(cls.poll)
+
+    def assertStateless(self, response):
+        """Check that a response is JSON and no session or CSRF state was used"""
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.cookies, {})
+        self.assertFalse(hasattr(response.wsgi_request, 'session'))
+        self.assertNotIn('CSRF_COOKIE', response.wsgi_request.META)
+
+    def test_get_under_api_profile(self):
+        """Test that a GET is served as JSON without sessions"""
+        response = self.client.get(reverse('poll-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertStateless(response)
+
+    def test_post_under_api_profile(self):
+        """Test that a POST succeeds without a CSRF token or session"""
+        url = reverse('poll-vote', kwargs={'pk': self.poll.pk})
+        response = self.client.post(url, {'option_id': self.option.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertStateless(response)
+
+    def test_admin_not_routed_under_api_profile(self):
+        """Test that the API-only URLconf does not expose the admin"""
+        self.assertEqual(self.client.get('/admin/').status_code, status.HTTP_404_NOT_FOUND)
+
+class SignedTokenAuthenticationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('voter')
+
+    def authenticate(self, header):
+        request = Request(APIRequestFactory().get('/', HTTP_AUTHORIZATION=header))
+        return SignedTokenAuthentication().authenticate(request)
+
+    def test_valid_token(self):
+        """Test that an issued token authenticates its user with one query"""
+        token = issue_token(self.user)
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate(f'Bearer {token}')
+        self.assertEqual(user, self.user)
+
+    def test_tampered_token(self):
+        """Test that a token with a bad signature is rejected"""
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(f'Bearer {issue_token(self.user)}x')
+
+    @override_settings(API_TOKEN_MAX_AGE=-1)
+    def test_expired_token(self):
+        """Test that a token older than API_TOKEN_MAX_AGE is rejected"""
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(f'Bearer {issue_token(self.user)}')
+
+    def test_other_schemes_are_ignored(self):
+        """Test that non-bearer credentials fall through to other authenticators"""
+        self.assertIsNone(self.authenticate('Basic dm90ZXI6c2VjcmV0'))
+
+class EdgeCaseTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.future_date = timezone.now() + timedelta(days=1)
+        cls.past_date = timezone.now() - timedelta(days=1)
         
     def test_create_poll_with_past_date(self):
         """Test creating poll with past publication date"""
@@ -258,10 +651,7 @@ class EdgeCaseTest(APITestCase):
     
     def test_create_option_empty_text(self):
         """Test creating option with empty text"""
-        poll = Poll.objects.create(
-            question_text="Test poll?",
-            pub_date=self.future_date
-        )
+        poll = make_poll(question_text="Test poll?", pub_date=self.future_date)
         url = reverse('option-list')
         option_data = {'option_text': '', 'poll': poll.pk}
         response = self.client.post(url, option_data, format='json')
@@ -270,10 +660,7 @@ class EdgeCaseTest(APITestCase):
     
     def test_create_option_too_long_text(self):
         """Test creating option with text too long"""
-        poll = Poll.objects.create(
-            question_text="Test poll?",
-            pub_date=self.future_date
-        )
+        poll = make_poll(question_text="Test poll?", pub_date=self.future_date)
         url = reverse('option-list')
         long_text = 'a' * 201  # 201 characters
         option_data = {'option_text': long_text, 'poll': poll.pk}
@@ -298,11 +685,136 @@ class EdgeCaseTest(APITestCase):
     def test_nonexistent_endpoints(self):
         """Test accessing non-existent resources"""
         # Non-existent poll
-        url = reverse('poll-detail', kwargs={'pk': 999})
+        url = reverse('poll-detail', kwargs={'pk': unused_pk(Poll)})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         
         # Non-existent option
-        url = reverse('option-detail', kwargs={'pk': 999})
+        url = reverse('option-detail', kwargs={'pk': unused_pk(Option)})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+# Scale tests (opt-in: python manage.py test --tag scale)
+@tag('scale')
+class ScaleAPITest(APITestCase):
+    """Exercise every endpoint against SCALE_ROWS rows per table.
+
+    Query counts must stay constant regardless of table size, and each
+    request must finish inside a per-endpoint wall-clock budget of a few
+    times its measured duration.
+    """
+    # Seconds allowed for a request touching a single row (measured <= 6 ms)
+    row_budget = 0.05
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.polls, cls.options = bulk_polls(SCALE_ROWS, options_per_poll=2)
+        cls.votes = bulk_votes(cls.options[:SCALE_ROWS])
+        cls.poll = cls.polls[0]
+        cls.option = cls.options[0]
+
+    def assertWithinBudget(self, num_queries, budget, method, url, data=None):
+        """Issue a request and check its query count and elapsed seconds"""
+        start = time.perf_counter()
+        with self.assertNumQueries(num_queries):
+            response = getattr(self.client, method)(url, data, format='json')
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, budget,
+                        f"{method.upper()} {url} took {elapsed:.3f}s (budget {budget}s)")
+        return response
+
+    def test_dataset_size(self):
+        """Test that the factories loaded the expected number of rows"""
+        self.assertEqual(Poll.objects.count(), SCALE_ROWS)
+        self.assertEqual(Option.objects.count(), SCALE_ROWS * 2)
+        self.assertEqual(Vote.objects.count(), SCALE_ROWS)
+
+    def test_poll_list_at_scale(self):
+        """Test listing polls prefetches options in a single extra query"""
+        response = self.assertWithinBudget(2, 4.0, 'get', reverse('poll-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), SCALE_ROWS)
+        self.assertEqual(len(response.data[0]['options']), 2)
+
+    def test_create_poll_at_scale(self):
+        """Test creating a poll against a large table"""
+        poll_data = {
+            'question_text': 'Scale poll?',
+            'pub_date': (timezone.now() + timedelta(days=1)).isoformat()
+        }
+        response = self.assertWithinBudget(2, self.row_budget, 'post', reverse('poll-list'), poll_data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_poll_detail_at_scale(self):
+        """Test retrieving one poll does not scan the whole table"""
+        url = reverse('poll-detail', kwargs={'pk': self.poll.pk})
+        response = self.assertWithinBudget(2, self.row_budget, 'get', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_update_poll_at_scale(self):
+        """Test updating one poll against a large table"""
+        url = reverse('poll-detail', kwargs={'pk': self.poll.pk})
+        poll_data = {
+            'question_text': 'Updated poll?',
+            'pub_date': (timezone.now() + timedelta(days=1)).isoformat()
+        }
+        response = self.assertWithinBudget(4, self.row_budget, 'put', url, poll_data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_delete_poll_at_scale(self):
+        """Test deleting a poll cascades to its options and votes only"""
+        url = reverse('poll-detail', kwargs={'pk': self.poll.pk})
+        response = self.assertWithinBudget(7, self.row_budget, 'delete', url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Poll.objects.count(), SCALE_ROWS - 1)
+
+    def test_submit_vote_at_scale(self):
+        """Test submitting a vote against a large votes table"""
+        url = reverse('poll-vote', kwargs={'pk': self.poll.pk})
+        vote_data = {'option_id': self.option.pk}
+        response = self.assertWithinBudget(7, self.row_budget, 'post', url, vote_data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_vote_list_at_scale(self):
+        """Test listing votes at scale"""
+        response = self.assertWithinBudget(1, 0.4, 'get', reverse('vote-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), SCALE_ROWS)
+
+    def test_option_list_at_scale(self):
+        """Test listing all options at scale"""
+        response = self.assertWithinBudget(1, 1.0, 'get', reverse('option-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), SCALE_ROWS * 2)
+
+    def test_create_option_at_scale(self):
+        """Test creating an option against a large options table"""
+        option_data = {'option_text': 'Scale option', 'poll': self.poll.pk}
+        response = self.assertWithinBudget(2, self.row_budget, 'post', reverse('option-list'), option_data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_poll_options_at_scale(self):
+        """Test listing one poll's options against a large options table"""
+        url = reverse('poll-options', kwargs={'poll_id': self.poll.pk})
+        response = self.assertWithinBudget(1, self.row_budget, 'get', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    def test_create_poll_option_at_scale(self):
+        """Test creating an option for one poll against a large options table"""
+        url = reverse('poll-options', kwargs={'poll_id': self.poll.pk})
+        option_data = {'option_text': 'Scale option', 'poll': self.poll.pk}
+        response = self.assertWithinBudget(2, self.row_budget, 'post', url, option_data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_option_detail_at_scale(self):
+        """Test retrieving, updating and deleting an option at scale"""
+        url = reverse('option-detail', kwargs={'pk': self.option.pk})
+        response = self.assertWithinBudget(1, self.row_budget, 'get', url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        update_data = {'option_text': 'Updated option', 'poll': self.poll.pk}
+        response = self.assertWithinBudget(3, self.row_budget, 'put', url, update_data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.assertWithinBudget(3, self.row_budget, 'delete', url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Option.objects.filter(pk=self.option.pk).exists())
@@ -3,18 +3,19 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
+from .idempotency import IdempotentCreateMixin
 from .models import Poll, Option, Vote
 from .serializers import PollSerializer, OptionSerializer, VoteSerializer
 
-class PollList(generics.ListCreateAPIView):
-    queryset = Poll.objects.all()
+class PollList(IdempotentCreateMixin, generics.ListCreateAPIView):
+    queryset = Poll.objects.prefetch_related('options')
     serializer_class = PollSerializer
 
 class PollDetail(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Poll.objects.all()
+    queryset = Poll.objects.prefetch_related('options')
     serializer_class = PollSerializer
 
-class VoteCreate(generics.CreateAPIView):
+class VoteCreate(IdempotentCreateMixin, generics.CreateAPIView):
     serializer_class = VoteSerializer
 
     def create(self, request, *args, **kwargs):
@@ -58,7 +59,7 @@ class VoteList(generics.ListAPIView):
     queryset = Vote.objects.all()
     serializer_class = VoteSerializer
 
-class OptionList(generics.ListCreateAPIView):
+class OptionList(IdempotentCreateMixin, generics.ListCreateAPIView):
     serializer_class = OptionSerializer
     
     def get_queryset(self):
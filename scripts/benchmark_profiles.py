@@ -0,0 +1,168 @@
+"""
+Compare startup and per-request cost of the default and API-only profiles.
+
+Each profile is measured in fresh subprocesses, driving its real WSGI or
+ASGI entry point in-process (no server), with DEBUG off:
+
+- import time and module count of the entry point, from ``-X importtime``
+- peak RSS of a worker after serving requests
+- mean time per request for an unrouted URL (no database) and for a poll
+  lookup (one query)
+
+Run from the project root against the local database:
+
+    python scripts/benchmark_profiles.py [--requests 2000] [--runs 3]
+
+Prints a Markdown table of the medians across runs.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# (column label, settings module, entry point module, interface)
+PROFILES = [
+    ('Default (WSGI)', 'PollAPI.settings', 'PollAPI.wsgi', 'wsgi'),
+    ('API-only, CONN_MAX_AGE=0 (WSGI)', 'PollAPI.settings_api_asgi', 'PollAPI.wsgi', 'wsgi'),
+    ('API-only (WSGI)', 'PollAPI.settings_api', 'PollAPI.wsgi_api', 'wsgi'),
+    ('Default (ASGI)', 'PollAPI.settings', 'PollAPI.asgi', 'asgi'),
+    ('API-only (ASGI)', 'PollAPI.settings_api_asgi', 'PollAPI.asgi_api', 'asgi'),
+]
+
+PATHS = {
+    'unrouted': '/benchmark-unrouted/',
+    'lookup': '/api/polls/999999/',
+}
+
+
+def run_python(args, settings_module):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module, 'PYTHONPATH': str(BASE_DIR)}
+    return subprocess.run([sys.executable, *args], cwd=BASE_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def measure_import(settings_module, entry):
+    """Return (modules imported, total import ms) for importing ``entry``"""
+    result = run_python(['-X', 'importtime', '-c', f'import {entry}'], settings_module)
+    modules, total_us = 0, 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        modules += 1
+        total_us += int(line.split(':', 1)[1].split('|')[0])
+    return modules, total_us / 1000
+
+
+def measure_worker(settings_module, entry, interface, requests):
+    result = run_python([__file__, '--worker', entry, interface, str(requests)], settings_module)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def worker(entry, interface, requests):
+    """Serve ``requests`` requests per path through ``entry`` and print JSON stats"""
+    import importlib
+    import logging
+
+    application = importlib.import_module(entry).application
+    from django.conf import settings
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['*']
+    logging.disable(logging.CRITICAL)
+
+    call = wsgi_caller(application) if interface == 'wsgi' else asgi_caller(application)
+    stats = {}
+    for name, path in PATHS.items():
+        call(path, 1)
+        start = time.perf_counter()
+        call(path, requests)
+        stats[name + '_ms'] = (time.perf_counter() - start) / requests * 1000
+    stats['rss_mib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(stats))
+
+
+def wsgi_caller(application):
+    def call(path, count):
+        for _ in range(count):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '',
+                'SERVER_NAME': 'benchmark', 'SERVER_PORT': '80', 'HTTP_ACCEPT': 'application/json',
+                'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http',
+            }
+            b''.join(application(environ, lambda status, headers, exc_info=None: None))
+    return call
+
+
+def asgi_caller(application):
+    async def request(path):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': b'', 'root_path': '', 'headers': [(b'accept', b'application/json')],
+            'server': ('benchmark', 80), 'client': ('127.0.0.1', 0),
+        }
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.Future()  # no disconnect until the response is sent
+
+        async def send(message):
+            pass
+
+        await application(scope, receive, send)
+
+    async def serve(path, count):
+        for _ in range(count):
+            await request(path)
+
+    def call(path, count):
+        asyncio.run(serve(path, count))
+    return call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--requests', type=int, default=2000, help='requests per path per run')
+    parser.add_argument('--runs', type=int, default=3, help='runs per profile; medians are reported')
+    args = parser.parse_args()
+
+    rows = {
+        'Modules imported by the entry point': [],
+        'Import time of the entry point, `-X importtime`': [],
+        'Peak RSS per worker': [],
+        'Per-request time, unrouted URL (no database)': [],
+        'Per-request time, poll lookup (one query)': [],
+    }
+    for label, settings_module, entry, interface in PROFILES:
+        imports = [measure_import(settings_module, entry) for _ in range(args.runs)]
+        workers = [measure_worker(settings_module, entry, interface, args.requests)
+                   for _ in range(args.runs)]
+        values = iter(rows.values())
+        next(values).append(f'{statistics.median(m for m, _ in imports):.0f}')
+        next(values).append(f'{statistics.median(ms for _, ms in imports):.0f} ms')
+        next(values).append(f"{statistics.median(w['rss_mib'] for w in workers):.1f} MiB")
+        next(values).append(f"{statistics.median(w['unrouted_ms'] for w in workers):.2f} ms")
+        next(values).append(f"{statistics.median(w['lookup_ms'] for w in workers):.2f} ms")
+
+    print('| | ' + ' | '.join(label for label, *_ in PROFILES) + ' |')
+    print('|---' * (len(PROFILES) + 1) + '|')
+    for name, cells in rows.items():
+        print(f'| {name} | ' + ' | '.join(cells) + ' |')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        worker(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main()